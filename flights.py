@@ -1,20 +1,98 @@
-from typing import Any
+from typing import TYPE_CHECKING, Literal
 import httpx
-import subprocess
 import sys
 import json
 import os
+import time
 import asyncio
+import heapq
+import re
+import shutil
+import socket
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import islice
+from contextlib import asynccontextmanager, suppress
 from mcp.server.fastmcp import FastMCP
 
-from fast_flights import FlightData, Passengers, Result, create_filter, get_flights_from_filter, search_airport
-from dataclasses import asdict
-
 from datetime import datetime
 
+# fast-flights and Playwright are heavy to import, so they are loaded on first use instead
+if TYPE_CHECKING:
+    from fast_flights import Result
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """Pre-warms the cache for FLIGHTS_WARM_ROUTES on startup and closes the shared Chromium browser on shutdown"""
+    # Start the Playwright check in the background so a missing browser never delays the handshake
+    if FETCH_MODE == "local":
+        _ensure_playwright_ready()
+    warm_tasks = [asyncio.create_task(_warm_route(*route)) for route in _parse_warm_routes(WARM_ROUTES)]
+    try:
+        yield
+    finally:
+        # Warm tasks only await shielded scrapes, so cancel the scrapes themselves before closing the browser
+        pending = [*warm_tasks, *_inflight.values()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        await _close_browser()
+
 
 # initialize the MCP server
-mcp = FastMCP("flights")
+mcp = FastMCP("flights", lifespan=lifespan)
+
+
+# fast-flights fetch mode: "local" scrapes with a local Chromium, "common" and "fallback" fetch over HTTP
+FETCH_MODE = os.environ.get("FLIGHTS_MCP_FETCH_MODE", "local")
+HTTP_TIMEOUT_SECONDS = 30.0
+
+# Shared HTTP client for the HTTP fetch modes, so keep-alive connections are reused across queries
+_http_client = None
+
+# The fast_flights module, once _load_fast_flights() has imported it
+_ff = None
+
+
+# Persistent Chromium profile for the "local" fetch mode, with a pool of reusable pages.
+# The profile directory keeps Google's cached assets and consent cookies across restarts.
+BROWSER_POOL_SIZE = max(1, int(os.environ.get("FLIGHTS_MCP_POOL_SIZE", "4")))
+BROWSER_USER_DATA_DIR = os.environ.get("FLIGHTS_MCP_USER_DATA_DIR", "./.pw-profile")
+BROWSER_ARGS = ["--disable-dev-shm-usage"]
+
+_playwright = None
+_browser_context = None
+# Per-process profile used when BROWSER_USER_DATA_DIR is held by another server, removed on close
+_temp_user_data_dir = None
+_page_pool: asyncio.Queue | None = None
+_browser_lock = asyncio.Lock()
+
+# Maximum number of scrapes running at once, defaulting to one per pooled page.
+# Clamped to at least 1, since a zero-sized semaphore would hang every tool call
+SCRAPE_CONCURRENCY = max(1, int(os.environ.get("FLIGHTS_MCP_CONCURRENCY", str(BROWSER_POOL_SIZE))))
+
+_scrape_semaphore = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+
+
+# Cache of fast-flights results, keyed on the normalized query tuple
+CACHE_MAXSIZE = 512
+CACHE_TTL_SECONDS = 300
+
+_flights_cache: "OrderedDict[tuple, tuple[float, Result]]" = OrderedDict()
+
+# In-flight scrapes, so concurrent identical queries share a single fetch
+_inflight: dict[tuple, asyncio.Future] = {}
+
+
+# Routes fetched in the background on startup, as comma-separated "ORIGIN-DESTINATION:YYYY-MM-DD" entries
+WARM_ROUTES = os.environ.get("FLIGHTS_WARM_ROUTES", "")
+
+
+# Background Playwright setup check for the "local" fetch mode, started on first need
+_playwright_setup: asyncio.Future | None = None
 
 
 # Helper Functions
@@ -27,6 +105,8 @@ def ensure_playwright_browsers():
     Returns:
         bool: True if browsers are available, False otherwise
     """
+    import subprocess
+
     try:
         # Check if playwright is available and browsers are installed
         result = subprocess.run(
@@ -36,12 +116,17 @@ def ensure_playwright_browsers():
             timeout=30
         )
         
-        # If dry-run succeeds without needing to download, browsers are already installed
-        if result.returncode == 0 and "is already installed" in result.stdout:
+        # The dry run lists where each browser it would download lives; if they all exist, nothing is missing
+        install_locations = [
+            line.split(":", 1)[1].strip()
+            for line in result.stdout.splitlines()
+            if line.strip().startswith("Install location:")
+        ]
+        if result.returncode == 0 and install_locations and all(os.path.isdir(path) for path in install_locations):
             return True
             
         # If browsers need to be installed, install them
-        print("Installing Playwright Chromium browser...")
+        print("Installing Playwright Chromium browser...", file=sys.stderr)
         install_result = subprocess.run(
             [sys.executable, "-m", "playwright", "install", "chromium"],
             capture_output=True,
@@ -50,27 +135,27 @@ def ensure_playwright_browsers():
         )
         
         if install_result.returncode == 0:
-            print("Playwright Chromium browser installed successfully!")
+            print("Playwright Chromium browser installed successfully!", file=sys.stderr)
             return True
         else:
-            print(f"Failed to install Playwright browsers: {install_result.stderr}")
+            print(f"Failed to install Playwright browsers: {install_result.stderr}", file=sys.stderr)
             return False
             
     except subprocess.TimeoutExpired:
-        print("Timeout occurred while installing Playwright browsers")
+        print("Timeout occurred while installing Playwright browsers", file=sys.stderr)
         return False
     except FileNotFoundError:
-        print("Playwright CLI not found. Make sure playwright is installed.")
+        print("Playwright CLI not found. Make sure playwright is installed.", file=sys.stderr)
         return False
     except Exception as e:
-        print(f"Error checking/installing Playwright browsers: {str(e)}")
+        print(f"Error checking/installing Playwright browsers: {str(e)}", file=sys.stderr)
         return False
 
 
 def check_playwright_setup():
     """
     Checks if Playwright setup is complete and attempts to fix it if not.
-    This function is called before making flight requests.
+    This function blocks, so it is run in a background thread via _ensure_playwright_ready().
     
     Returns:
         bool: True if setup is complete, False otherwise
@@ -83,81 +168,729 @@ def check_playwright_setup():
         return ensure_playwright_browsers()
         
     except ImportError:
-        print("Playwright is not installed. Please install it with: pip install playwright")
+        print("Playwright is not installed. Please install it with: pip install playwright", file=sys.stderr)
         return False
     except Exception as e:
-        print(f"Error during Playwright setup check: {str(e)}")
+        print(f"Error during Playwright setup check: {str(e)}", file=sys.stderr)
         return False
 
 
+# Accepted tool inputs
+_TRIP_TYPES = frozenset({"one-way", "round-trip"})
+_SEATS = frozenset({"economy", "premium-economy", "business", "first"})
+_STATES = frozenset({"before", "after"})
+_RESPONSE_FORMATS = frozenset({"json", "text"})
+_DEPARTURE_DATE_RE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+
+
+# Full month and weekday names for the abbreviations Google Flights uses
+_MONTH_NAMES = {
+    'Jan': 'January', 'Feb': 'February', 'Mar': 'March',
+    'Apr': 'April', 'May': 'May', 'Jun': 'June',
+    'Jul': 'July', 'Aug': 'August', 'Sep': 'September',
+    'Oct': 'October', 'Nov': 'November', 'Dec': 'December'
+}
+_DAY_NAMES = {'Mon': 'Monday', 'Tue': 'Tuesday', 'Wed': 'Wednesday',
+              'Thu': 'Thursday', 'Fri': 'Friday', 'Sat': 'Saturday',
+              'Sun': 'Sunday'}
+
+
+def _ordinal_suffix(day):
+    """
+    Returns the ordinal suffix for a day of the month ("st", "nd", "rd" or "th").
+    """
+    if day % 100 in (11, 12, 13):
+        return 'th'
+    return {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')
+
+
+_ORDINAL_SUFFIXES = {str(day): _ordinal_suffix(day) for day in range(1, 32)}
+
+# Google Flights date, e.g. "9:40 AM on Sat, Apr 5"
+_FLIGHT_DATE_RE = re.compile(r"(\d{1,2}:\d{2}) (AM|PM) on (\w{3}), (\w{3}) (\d{1,2})")
+
+
+def _expand_date(date_str):
+    """
+    Expands a Google Flights date ("9:40 AM on Sat, Apr 5") into "9:40 AM on Saturday, April 5th".
+    """
+    match = _FLIGHT_DATE_RE.match(date_str)
+    if match is None:
+        raise ValueError(f"Unrecognized flight date: {date_str!r}")
+
+    time_str, meridiem, day_abbr, month_abbr, day = match.groups()
+
+    full_day = _DAY_NAMES.get(day_abbr, day_abbr)
+    full_month = _MONTH_NAMES.get(month_abbr, month_abbr)
+
+    return f"{time_str} {meridiem} on {full_day}, {full_month} {day}{_ORDINAL_SUFFIXES.get(day, 'th')}"
+
+
+# Stop counts are nearly always small, so their text is built once and shared
+_STOPS_TEXT = {stops: f"{stops} stop{'s' if stops != 1 else ''}" if stops > 0 else "non-stop" for stops in range(10)}
+
+_BEST_FLIGHT_QUALIFIERS = {
+    True: "considered one of the best options by Google Flights",
+    False: "an available option"
+}
+
+
+@lru_cache(maxsize=4096)
+def _format_flight_parts(departure, arrival, name, duration, stops, price, is_best):
+    """
+    Memoized, route-independent parts of a flight description, keyed on the flight fields they read.
+
+    Returns:
+        Tuple of (expanded departure, expanded arrival, text from the operator to the end)
+    """
+    duration_parts = duration.split()
+
+    if len(duration_parts) == 4:
+        duration_formatted = f"{duration_parts[0]} hours and {duration_parts[2]} minutes"
+    else:
+        duration_formatted = duration
+
+    # Handle potential None or empty values
+    stops_text = _STOPS_TEXT.get(stops)
+    if stops_text is None:
+        stops_text = f"{stops} stop{'s' if stops != 1 else ''}" if stops > 0 else "non-stop"
+
+    details = "".join((
+        "The flight is operated by ", name, " and has a duration of ", duration_formatted,
+        " with ", stops_text, " in between. ",
+        "And it's price is ", price, " and is ", _BEST_FLIGHT_QUALIFIERS[bool(is_best)], "!"
+    ))
+
+    return _expand_date(departure), _expand_date(arrival), details
+
+
+def _make_formatter(origin_airport, destination_airport):
+    """
+    Returns a function that formats a flight for the given route, with the route text built once.
+    """
+    origin_text = f" from {origin_airport}, local time, and arrives at "
+    destination_text = f" in {destination_airport}, local time. "
+
+    def format_flight(flight_data):
+        departure, arrival, details = _format_flight_parts(
+            flight_data.departure,
+            flight_data.arrival,
+            flight_data.name,
+            flight_data.duration,
+            flight_data.stops,
+            flight_data.price,
+            flight_data.is_best
+        )
+        return "".join(("This flight departs at ", departure, origin_text, arrival, destination_text, details))
+
+    return format_flight
+
+
 def format_flight_info(flight_data, origin_airport, destination_airport):
     """
     Formats flight information into a human-readable string.
 
     Args:
-        flight_data: Dictionary containing flight information
+        flight_data: fast-flights Flight containing the flight information
         origin_airport: Name of Origin airport city and IATA code (ex: "Seattle (SEA)")
         destination_airport: Name of Destination airport city and IATA code (ex: "Tokyo (HND)")
 
     Returns:
         Formatted string describing the flight
     """
-    
-    duration_parts = flight_data['duration'].split()
-    
-    if len(duration_parts) == 4:
-        duration_formatted = f"{duration_parts[0]} hours and {duration_parts[2]} minutes"
-    else:
-        duration_formatted = flight_data['duration']
-    
-    # Reformat departure and arrival dates
-    def expand_date(date_str):
-        # Map abbreviated month and day
-        month_map = {
-            'Jan': 'January', 'Feb': 'February', 'Mar': 'March', 
-            'Apr': 'April', 'May': 'May', 'Jun': 'June', 
-            'Jul': 'July', 'Aug': 'August', 'Sep': 'September', 
-            'Oct': 'October', 'Nov': 'November', 'Dec': 'December'
-        }
-        day_map = {'Mon': 'Monday', 'Tue': 'Tuesday', 'Wed': 'Wednesday', 
-                   'Thu': 'Thursday', 'Fri': 'Friday', 'Sat': 'Saturday', 
-                   'Sun': 'Sunday'}
-        
-        parts = date_str.split()
-        time = f"{parts[0]} {parts[1]}"  # "9:40 AM"
-        
-        # Handle the day abbreviation (removing the comma)
-        day_abbr = parts[3].rstrip(',')  # "Sat" (removing comma from "Sat,")
-        month_abbr = parts[4]  # "Apr"
-        day = parts[5]  # "5"
-        
-        full_day = day_map.get(day_abbr, day_abbr)
-        full_month = month_map.get(month_abbr, month_abbr)
-        
-        # Add ordinal suffix to the day
-        day_with_suffix = day + ('th' if not day.endswith(('1', '2', '3')) or day.endswith(('11', '12', '13')) else 
-                                 ('st' if day.endswith('1') else 
-                                  ('nd' if day.endswith('2') else 
-                                   ('rd' if day.endswith('3') else 'th'))))
-        
-        return f"{time} on {full_day}, {full_month} {day_with_suffix}"
-    
-    # Determine best flight qualifier
-    best_flight_qualifier = "considered one of the best options by Google Flights" if flight_data['is_best'] else "an available option"
-    
-    # Handle potential None or empty values
-    stops = flight_data["stops"]
-    stops_text = f"{stops} stop{'s' if stops != 1 else ''}" if stops > 0 else "non-stop"
-    
-    formatted_string = (
-        f"This flight departs at {expand_date(flight_data['departure'])} from {origin_airport}, local time, "
-        f"and arrives at {expand_date(flight_data['arrival'])} in {destination_airport}, local time. "
-        f"The flight is operated by {flight_data['name']} and has a duration of {duration_formatted} "
-        f"with {stops_text} in between. "
-        f"And it's price is {flight_data['price']} and is {best_flight_qualifier}!"
+
+    return _make_formatter(origin_airport, destination_airport)(flight_data)
+
+
+def _cache_get(key):
+    """
+    Returns the cached Result for key, or None if it is missing or expired.
+    """
+    entry = _flights_cache.get(key)
+    if entry is None:
+        return None
+
+    expires_at, result = entry
+    if expires_at < time.monotonic():
+        del _flights_cache[key]
+        return None
+
+    _flights_cache.move_to_end(key)
+    return result
+
+
+def _cache_put(key, result):
+    """
+    Stores result under key, evicting the least recently used entries past CACHE_MAXSIZE.
+    """
+    _flights_cache[key] = (time.monotonic() + CACHE_TTL_SECONDS, result)
+    _flights_cache.move_to_end(key)
+    while len(_flights_cache) > CACHE_MAXSIZE:
+        _flights_cache.popitem(last=False)
+
+
+def _shared_fetch(params):
+    """
+    Drop-in replacement for fast_flights.core.fetch that reuses the shared HTTP client.
+    """
+    global _http_client
+    if _http_client is None:
+        from fast_flights.primp import Client
+        _http_client = Client(impersonate="chrome_126", verify=False, timeout=HTTP_TIMEOUT_SECONDS)
+
+    res = _http_client.get("https://www.google.com/travel/flights", params=params)
+    assert res.status_code == 200, f"{res.status_code} Result: {res.text_markdown}"
+    return res
+
+
+def _load_fast_flights():
+    """
+    Imports fast-flights on first use and returns the module.
+    """
+    global _ff
+    if _ff is None:
+        import fast_flights
+
+        # fast-flights builds a new client for every fetch, so route it through the shared one instead
+        fast_flights.core.fetch = _shared_fetch
+        _ff = fast_flights
+
+    return _ff
+
+
+class _PageResponse:
+    """
+    Minimal stand-in for the response object fast-flights' parser expects.
+    """
+
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+        self.text_markdown = text
+
+
+def _ensure_playwright_ready():
+    """
+    Returns a future for the Playwright setup check, starting it in a background thread if needed.
+    Only a successful check is remembered; after a failure the next call runs it again.
+    """
+    global _playwright_setup
+    if _playwright_setup is None:
+        loop = asyncio.get_running_loop()
+        _playwright_setup = future = loop.create_future()
+
+        def finish(ok):
+            global _playwright_setup
+            # Failures may be transient (a timeout or a failed download), so let the next scrape retry
+            if not ok and _playwright_setup is future:
+                _playwright_setup = None
+            if not future.done():
+                future.set_result(ok)
+
+        def run_check():
+            ok = check_playwright_setup()
+            # The loop may already be closed if the server shut down mid-install
+            with suppress(RuntimeError):
+                loop.call_soon_threadsafe(finish, ok)
+
+        # A daemon thread rather than to_thread(), so an install still running never holds up shutdown
+        threading.Thread(target=run_check, name="playwright-setup", daemon=True).start()
+    return _playwright_setup
+
+
+def _profile_in_use(user_data_dir):
+    """
+    Returns True if a running Chromium holds user_data_dir, judging by the SingletonLock it creates there.
+    """
+    try:
+        # Chromium points the lock at "<hostname>-<pid>"
+        owner = os.readlink(os.path.join(user_data_dir, "SingletonLock"))
+    except OSError:
+        return False
+
+    host, _, pid = owner.rpartition("-")
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        # Stale lock from a Chromium that has exited; Chromium takes it over itself
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+async def _get_page_pool():
+    """
+    Returns the browser page pool, launching Chromium with the persistent profile on first use.
+    """
+    global _playwright, _browser_context, _page_pool, _temp_user_data_dir
+
+    if _page_pool is not None:
+        return _page_pool
+
+    async with _browser_lock:
+        if _page_pool is None:
+            if not await asyncio.shield(_ensure_playwright_ready()):
+                raise RuntimeError(
+                    "Playwright Chromium is not available; install it with `playwright install chromium` "
+                    "or set FLIGHTS_MCP_FETCH_MODE=common"
+                )
+
+            from playwright.async_api import async_playwright
+
+            try:
+                # Chromium refuses a second instance on a profile that is in use, e.g. by another
+                # server started from the same directory, so fall back to a throwaway profile
+                user_data_dir = BROWSER_USER_DATA_DIR
+                if _profile_in_use(user_data_dir):
+                    _temp_user_data_dir = user_data_dir = tempfile.mkdtemp(prefix="flights-mcp-profile-")
+                    print(f"Chromium profile {BROWSER_USER_DATA_DIR} is in use by another process, "
+                          f"using a temporary profile instead", file=sys.stderr)
+
+                _playwright = await async_playwright().start()
+                _browser_context = await _playwright.chromium.launch_persistent_context(
+                    user_data_dir=user_data_dir,
+                    headless=True,
+                    args=BROWSER_ARGS
+                )
+
+                # A persistent context opens with one blank page already, so reuse it
+                pages = list(_browser_context.pages)
+                while len(pages) < BROWSER_POOL_SIZE:
+                    pages.append(await _browser_context.new_page())
+            except BaseException:
+                # Don't leave a half-started driver or temporary profile behind for the next attempt
+                with suppress(Exception):
+                    await _teardown_browser()
+                raise
+
+            pool = asyncio.Queue()
+            for page in pages:
+                pool.put_nowait(page)
+            _page_pool = pool
+
+    return _page_pool
+
+
+async def _close_browser():
+    """
+    Closes the shared Chromium profile and Playwright driver, if they were started.
+    """
+    async with _browser_lock:
+        await _teardown_browser()
+
+
+async def _teardown_browser():
+    """
+    Closes whatever parts of the browser were started and resets them; the caller holds _browser_lock.
+    """
+    global _playwright, _browser_context, _page_pool, _temp_user_data_dir
+
+    try:
+        if _browser_context is not None:
+            await _browser_context.close()
+    finally:
+        try:
+            if _playwright is not None:
+                await _playwright.stop()
+        finally:
+            _playwright = _browser_context = _page_pool = None
+            if _temp_user_data_dir is not None:
+                shutil.rmtree(_temp_user_data_dir, ignore_errors=True)
+                _temp_user_data_dir = None
+
+
+def _is_page_gone(page, error):
+    """
+    Returns True if error means the page, or the context and Chromium behind it, has closed or crashed.
+    """
+    message = str(error)
+    return page.is_closed() or "has been closed" in message or "crashed" in message
+
+
+async def _replace_page(pool, broken):
+    """
+    Replaces a closed or crashed pooled page with a fresh one from the same context.
+
+    Returns:
+        The new page, or None if the context itself is gone and the pool was dropped so the
+        next scrape relaunches Chromium
+    """
+    with suppress(Exception):
+        await broken.close()
+
+    context = _browser_context
+    if _page_pool is not pool or context is None:
+        return None
+
+    try:
+        # A renderer crash only takes down its own tab, so the other pooled pages keep working
+        return await context.new_page()
+    except Exception:
+        if _page_pool is pool:
+            with suppress(Exception):
+                await _close_browser()
+        return None
+
+
+async def _scrape_local(params):
+    """
+    Loads the Google Flights results page in a pooled browser page and returns its main HTML.
+    """
+    url = "https://www.google.com/travel/flights?" + "&".join(f"{k}={v}" for k, v in params.items())
+
+    pool = await _get_page_pool()
+    page = await pool.get()
+    try:
+        await page.goto(url)
+        if page.url.startswith("https://consent.google.com"):
+            await page.click('text="Accept all"')
+        await page.locator('.eQ35Ce').wait_for()
+        return await page.evaluate(
+            "() => document.querySelector('[role=\"main\"]').innerHTML"
+        )
+    except Exception as e:
+        if _is_page_gone(page, e):
+            # Never hand the dead page back out
+            broken, page = page, None
+            page = await _replace_page(pool, broken)
+        raise
+    finally:
+        if page is not None:
+            pool.put_nowait(page)
+
+
+async def _query_flights(key):
+    """
+    Runs the fast-flights query for key and stores the Result in the cache.
+    """
+    ff = _load_fast_flights()
+
+    origin, destination, date, trip_type, seat, passengers = key
+    adults, children, infants_in_seat, infants_on_lap = passengers
+
+    flight_data_input = [ff.FlightData(date=date, from_airport=origin, to_airport=destination)]
+    passengers_input = ff.Passengers(adults=adults, children=children, infants_in_seat=infants_in_seat, infants_on_lap=infants_on_lap)
+
+    # Create filter first, then get flights
+    filter = ff.create_filter(
+        flight_data=flight_data_input,
+        trip=trip_type,
+        seat=seat,
+        passengers=passengers_input
     )
-    
-    return formatted_string
+
+    # Bound concurrent scrapes in every fetch mode so a burst of requests can't exhaust memory
+    async with _scrape_semaphore:
+        if FETCH_MODE == "local":
+            # Same request fast-flights makes, but scraped with the shared browser instead of a fresh launch
+            params = {
+                "tfs": filter.as_b64().decode("utf-8"),
+                "hl": "en",
+                "tfu": "EgQIABABIgA",
+                "curr": "",
+            }
+            html = await _scrape_local(params)
+            result = await asyncio.to_thread(ff.core.parse_response, _PageResponse(html))
+        else:
+            result = await asyncio.to_thread(ff.get_flights_from_filter, filter, mode=FETCH_MODE)
+
+    _cache_put(key, result)
+    return result
+
+
+async def _fetch_flights(origin, destination, date, trip_type, seat, passengers):
+    """
+    Fetches flights from Google Flights via fast-flights, serving repeated queries from the cache
+    and coalescing concurrent identical queries onto a single scrape.
+
+    Args:
+        origin: Origin airport IATA code
+        destination: Destination airport IATA code
+        date: Departure date in YYYY-MM-DD format
+        trip_type: "one-way" or "round-trip"
+        seat: Seat type
+        passengers: Tuple of (adults, children, infants_in_seat, infants_on_lap)
+
+    Returns:
+        The fast-flights Result for the query
+    """
+    key = (origin.upper(), destination.upper(), date, trip_type, seat, passengers)
+
+    result = _cache_get(key)
+    if result is not None:
+        return result
+
+    # No await between the lookup and the insert, so this is atomic on the event loop
+    future = _inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_query_flights(key))
+        _inflight[key] = future
+        future.add_done_callback(lambda _: _inflight.pop(key, None))
+
+    # Shield so one caller being cancelled doesn't cancel the scrape for everyone else
+    return await asyncio.shield(future)
+
+
+def _validate(origin, destination, departure_date, trip_type, seat, state=None, response_format="json"):
+    """
+    Validates the search inputs shared by the tools.
+
+    Returns:
+        An error message for the first invalid input, or None if they are all valid
+    """
+    if (len(origin) != 3 or len(destination) != 3):
+        return "Origin and destination must be 3 characters."
+
+    if not _DEPARTURE_DATE_RE.fullmatch(departure_date):
+        return "Departure date must be in YYYY-MM-DD format."
+
+    if trip_type not in _TRIP_TYPES:
+        return "Trip type must be either 'one-way' or 'round-trip'."
+
+    if seat not in _SEATS:
+        return "Seat type must be either 'economy', 'premium-economy', 'business', or 'first'."
+
+    if state is not None and state not in _STATES:
+        return "State must be either 'before' or 'after'."
+
+    if response_format not in _RESPONSE_FORMATS:
+        return "Response format must be either 'json' or 'text'."
+
+    return None
+
+
+def _parse_warm_routes(value):
+    """
+    Parses FLIGHTS_WARM_ROUTES ("SFO-JFK:2025-04-05,LAX-NRT:2025-05-01") into (origin, destination, date) tuples,
+    skipping malformed entries.
+    """
+    routes = []
+
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+
+        route, _, departure_date = entry.partition(":")
+        origin, _, destination = route.partition("-")
+
+        if err := _validate(origin, destination, departure_date, "one-way", "economy"):
+            print(f"Skipping warm route {entry!r}: {err}", file=sys.stderr)
+            continue
+
+        routes.append((origin, destination, departure_date))
+
+    return routes
+
+
+async def _warm_route(origin, destination, departure_date):
+    """
+    Fetches a route with the tools' default options so the first matching request is a cache hit.
+    """
+    try:
+        await _fetch_flights(origin, destination, departure_date, "one-way", "economy", (1, 0, 0, 0))
+    except Exception as e:
+        print(f"Failed to warm route {origin}-{destination} on {departure_date}: {str(e)}", file=sys.stderr)
+
+
+def _parse_price(flight):
+    """
+    Parses a flight's price ("$1,234") into a float, or infinity if it is unavailable.
+    """
+    price_str = flight.price
+    if not price_str or price_str == 'Price unavailable':
+        return float('inf')
+
+    # Remove $ and any commas from the price string
+    price_str = price_str.replace('$', '').replace(',', '')
+
+    try:
+        return float(price_str)
+    except (ValueError, TypeError):
+        return float('inf')
+
+
+def _departure_minutes(flight):
+    """
+    Parses the time of day out of a flight's departure ("9:40 AM on Sat, Apr 5") as minutes since midnight.
+    Hand-rolled because strptime is slow to run once per flight.
+    """
+    hour_minute, meridiem = flight.departure.split(" ", 2)[:2]
+    hour, minute = hour_minute.split(":")
+
+    hour = int(hour) % 12
+    if meridiem == "PM":
+        hour += 12
+
+    return hour * 60 + int(minute)
+
+
+def _general_flights_view(result, n_flights):
+    """
+    Selects the first n_flights flights, summarized by the overall price level for the route.
+
+    Returns:
+        Tuple of (summary message, selected flights)
+    """
+    current_price = result.current_price
+    all_flights = result.flights
+
+    if not all_flights:
+        return "No flights found for the specified route and dates.", []
+
+    top_n_flights = all_flights[0: min(n_flights, len(all_flights))]
+
+    return f"The current overall flight prices for this route and time are: {str(current_price)}.", top_n_flights
+
+
+def _cheapest_flights_view(result):
+    """
+    Selects the 30 cheapest flights, sorted by price.
+
+    Returns:
+        Tuple of (summary message, selected flights)
+    """
+    all_flights = result.flights
+
+    if not all_flights:
+        return "No flights found for the specified route and dates.", []
+
+    # Partial sort: only the 30 cheapest flights are ever ordered
+    top_n_flights = heapq.nsmallest(30, all_flights, key=_parse_price)
+
+    return "Here are the cheapest flights for this route and time: ", top_n_flights
+
+
+def _best_flights_view(result):
+    """
+    Selects up to 30 of the flights Google Flights marks as best.
+
+    Returns:
+        Tuple of (summary message, selected flights)
+    """
+    all_flights = result.flights
+
+    if not all_flights:
+        return "No flights found for the specified route and dates.", []
+
+    # Stop scanning as soon as 30 best flights are found
+    top_n_flights = list(islice((flight for flight in all_flights if flight.is_best), 30))
+
+    if not top_n_flights:
+        return "No best flights found for the specified route and dates.", []
+
+    return "Here are the best flights for this route and time: ", top_n_flights
+
+
+def _time_filtered_flights_view(result, state, target_minutes, target_time_str):
+    """
+    Selects up to 30 flights departing before, or on or after, target_minutes past midnight.
+
+    Returns:
+        Tuple of (summary message, selected flights)
+    """
+    all_flights = result.flights
+
+    if not all_flights:
+        return "No flights found for the specified route and dates.", []
+
+    # Parse departure times lazily and stop scanning as soon as 30 matching flights are found
+    if (state == "before"):
+        valid_flights = (flight for flight in all_flights if _departure_minutes(flight) < target_minutes)
+    else:
+        valid_flights = (flight for flight in all_flights if _departure_minutes(flight) >= target_minutes)
+
+    top_n_flights = list(islice(valid_flights, 30))
+
+    if not top_n_flights:
+        return f"No flights found {state} {target_time_str} for the specified route and dates.", []
+
+    context_str = f"Here are the time-filtered flights {('before' if state == 'before' else 'on or after')} {target_time_str}: "
+
+    return context_str, top_n_flights
+
+
+def _flight_to_json(flight):
+    """
+    Converts a fast-flights Flight into a JSON-ready dict, with its price parsed to a number
+    and its departure time parsed to minutes since midnight.
+    """
+    price_value = _parse_price(flight)
+
+    try:
+        departure_minutes = _departure_minutes(flight)
+    except (AttributeError, ValueError):
+        departure_minutes = None
+
+    return {
+        "name": flight.name,
+        "departure": flight.departure,
+        "departure_minutes": departure_minutes,
+        "arrival": flight.arrival,
+        "arrival_time_ahead": flight.arrival_time_ahead,
+        "duration": flight.duration,
+        "stops": flight.stops,
+        "delay": flight.delay,
+        "price": flight.price,
+        "price_value": None if price_value == float('inf') else price_value,
+        "is_best": flight.is_best
+    }
+
+
+def _postprocess(result, origin, destination, views, n_flights=40, response_format="json"):
+    """
+    Renders the requested views of a fast-flights Result. Called through asyncio.to_thread
+    so the filtering and formatting don't block the event loop.
+
+    Args:
+        result: The fast-flights Result
+        origin: Origin airport IATA code
+        destination: Destination airport IATA code
+        views: List of (view, target_minutes, target_time_str) tuples, where view is "general", "cheapest",
+            "best", "before" or "after" and the target time is only set for "before" and "after"
+        n_flights: The number of flights for the "general" view
+        response_format: "json" for one compact JSON object per view, or "text" for a summary
+            followed by one human-readable description per flight
+
+    Returns:
+        list[str]: The output of every view, in order
+    """
+    if result is None or result.flights is None:
+        return ["No flight data available for the specified route and dates."]
+
+    # Every view shares one formatter, so the route text is built once per request
+    format_flight = _make_formatter(origin, destination) if response_format == "text" else None
+
+    output = []
+
+    for view, target_minutes, target_time_str in views:
+        if (view == "general"):
+            summary, flights = _general_flights_view(result, n_flights)
+        elif (view == "cheapest"):
+            summary, flights = _cheapest_flights_view(result)
+        elif (view == "best"):
+            summary, flights = _best_flights_view(result)
+        else:
+            summary, flights = _time_filtered_flights_view(result, view, target_minutes, target_time_str)
+
+        if response_format == "text":
+            output.append(summary)
+            output += [format_flight(flight) for flight in flights]
+        else:
+            output.append(json.dumps({
+                "view": view if target_time_str is None else f"{view}:{target_time_str}",
+                "summary": summary.strip(),
+                "current_price": result.current_price,
+                "flights": [_flight_to_json(flight) for flight in flights]
+            }, separators=(",", ":")))
+
+    return output
+
 
 
 
@@ -169,7 +902,8 @@ def format_flight_info(flight_data, origin_airport, destination_airport):
 async def get_general_flights_info(origin: str, destination: str, departure_date: str,
                       trip_type: str = "one-way", seat: str = "economy",
                       adults: int = 1, children: int = 0, infants_in_seat: int = 0, infants_on_lap: int = 0,
-                      n_flights: int = 40) -> list[str]:
+                      n_flights: int = 40,
+                      response_format: Literal["text", "json"] = "json") -> list[str]:
     """ Get general/comprehensive flight information for N flights for a given origin, destination, and departure date. If the user wants to do a round-trip,
     you will need to make two one-way trip calls.
 
@@ -186,67 +920,23 @@ async def get_general_flights_info(origin: str, destination: str, departure_date
         infants_lap (int, optional): The number of infants on a lap. Defaults to 0.
 
         n_flights (int, optional): The number of flights to return. Defaults to 25.
+        response_format (str, optional): The response format ("json" or "text" only). "json" returns one compact JSON object per result set,
+            with each flight's fields and its price as a number. "text" returns human-readable descriptions and is deprecated. Defaults to "json".
 
     Returns:
         list[str]: A list of flight information strings.
     """
 
-    if (len(origin) != 3 or len(destination) != 3):
-        return ["Origin and destination must be 3 characters."]
-    
-    if (len(departure_date) != 10 or departure_date[4] != '-' or departure_date[7] != '-'):
-        return ["Departure date must be in YYYY-MM-DD format."]
-    
-    if (trip_type != "one-way" and trip_type != "round-trip"):
-        return ["Trip type must be either 'one-way' or 'round-trip'."]
-    
-    if (seat != "economy" and seat != "premium-economy" and seat != "business" and seat != "first"):
-        return ["Seat type must be either 'economy', 'premium-economy', 'business', or 'first'."]
-    
+    if err := _validate(origin, destination, departure_date, trip_type, seat, response_format=response_format):
+        return [err]
 
     try:
         
-        # Make API call to Google Flights via fast-flights
-
-        flight_data_input = [FlightData(date=departure_date, from_airport=origin, to_airport=destination)]
-        
-        passengers_input = Passengers(adults=adults, children=children, infants_in_seat=infants_in_seat, infants_on_lap=infants_on_lap)
-
-        # Create filter first, then get flights
-        filter = create_filter(
-            flight_data=flight_data_input,
-            trip=trip_type,
-            seat=seat,
-            passengers=passengers_input
-        )
-        
-        result: Result = await asyncio.to_thread(get_flights_from_filter, filter, mode="local")
+        # Make API call to Google Flights via fast-flights (cached)
+        passengers = (adults, children, infants_in_seat, infants_on_lap)
+        result: Result = await _fetch_flights(origin, destination, departure_date, trip_type, seat, passengers)
         
-        result = asdict(result)
-        
-        if not result or "flights" not in result:
-            return ["No flight data available for the specified route and dates."]
-
-        current_price = result["current_price"]
-        all_flights = result["flights"]
-
-        if not all_flights:
-            return ["No flights found for the specified route and dates."]
-
-        top_n_flights = all_flights[0: min(n_flights, len(all_flights))]
-
-        flight_info = []
-
-        origin_airport = origin
-        destination_airport = destination
-
-        for flight in top_n_flights:
-            flight_info.append(format_flight_info(flight, origin_airport, destination_airport))
-
-        output = [f"The current overall flight prices for this route and time are: {str(current_price)}."] + flight_info
-
-
-        return output
+        return await asyncio.to_thread(_postprocess, result, origin, destination, [("general", None, None)], n_flights, response_format=response_format)
 
 
     except httpx.RequestError:
@@ -263,7 +953,8 @@ async def get_general_flights_info(origin: str, destination: str, departure_date
 @mcp.tool()
 async def get_cheapest_flights(origin: str, destination: str, departure_date: str,
                       trip_type: str = "one-way", seat: str = "economy",
-                      adults: int = 1, children: int = 0, infants_in_seat: int = 0, infants_on_lap: int = 0) -> list[str]:
+                      adults: int = 1, children: int = 0, infants_in_seat: int = 0, infants_on_lap: int = 0,
+                      response_format: Literal["text", "json"] = "json") -> list[str]:
    
     """ Get the cheapest flight information for a given origin, destination, and departure date. If the user wants to do a round-trip,
     you will need to make two one-way trip calls.
@@ -279,79 +970,22 @@ async def get_cheapest_flights(origin: str, destination: str, departure_date: st
         children (int, optional): The number of children. Defaults to 0.
         infants_in_seat (int, optional): The number of infants in a seat. Defaults to 0.
         infants_lap (int, optional): The number of infants on a lap. Defaults to 0.
+        response_format (str, optional): The response format ("json" or "text" only). "json" returns one compact JSON object per result set,
+            with each flight's fields and its price as a number. "text" returns human-readable descriptions and is deprecated. Defaults to "json".
 
     Returns:
         list[str]: A list of flight information strings.
     """
 
-    if (len(origin) != 3 or len(destination) != 3):
-        return ["Origin and destination must be 3 characters."]
-    
-    if (len(departure_date) != 10 or departure_date[4] != '-' or departure_date[7] != '-'):
-        return ["Departure date must be in YYYY-MM-DD format."]
-    
-    if (trip_type != "one-way" and trip_type != "round-trip"):
-        return ["Trip type must be either 'one-way' or 'round-trip'."]
-    
-    if (seat != "economy" and seat != "premium-economy" and seat != "business" and seat != "first"):
-        return ["Seat type must be either 'economy', 'premium-economy', 'business', or 'first'."]
+    if err := _validate(origin, destination, departure_date, trip_type, seat, response_format=response_format):
+        return [err]
 
     try:
-        # Make API call to Google Flights via fast-flights
-
-        flight_data_input = [FlightData(date=departure_date, from_airport=origin, to_airport=destination)]
-        passengers_input = Passengers(adults=adults, children=children, infants_in_seat=infants_in_seat, infants_on_lap=infants_on_lap)
-
-        # Create filter first, then get flights
-        filter = create_filter(
-            flight_data=flight_data_input,
-            trip=trip_type,
-            seat=seat,
-            passengers=passengers_input
-        )
-        
-        result: Result = await asyncio.to_thread(get_flights_from_filter, filter, mode="local")
+        # Make API call to Google Flights via fast-flights (cached)
+        passengers = (adults, children, infants_in_seat, infants_on_lap)
+        result: Result = await _fetch_flights(origin, destination, departure_date, trip_type, seat, passengers)
         
-        result = asdict(result)
-        
-        if not result or "flights" not in result:
-            return ["No flight data available for the specified route and dates."]
-
-        all_flights = result["flights"]
-
-        if not all_flights:
-            return ["No flights found for the specified route and dates."]
-
-        def get_price_value(flight):
-            price_str = flight.get('price')
-            if not price_str or price_str == 'Price unavailable':
-                return float('inf')
-            
-            # Remove $ and any commas from the price string
-            price_str = price_str.replace('$', '').replace(',', '')
-            
-            try:
-                return float(price_str)
-            except (ValueError, TypeError):
-                return float('inf')
-
-        price_sorted_flights = sorted(all_flights, key=get_price_value)
-
-        top_n_flights = price_sorted_flights[0: min(30, len(price_sorted_flights))]
-
-        flight_info = []
-
-        origin_airport = origin
-        destination_airport = destination
-
-        for flight in top_n_flights:
-            flight_info.append(format_flight_info(flight, origin_airport, destination_airport))
-
-        output = ["Here are the cheapest flights for this route and time: "] + flight_info
-
-
-        return output
-
+        return await asyncio.to_thread(_postprocess, result, origin, destination, [("cheapest", None, None)], response_format=response_format)
 
 
     except httpx.RequestError:
@@ -367,7 +1001,8 @@ async def get_cheapest_flights(origin: str, destination: str, departure_date: st
 @mcp.tool()
 async def get_best_flights(origin: str, destination: str, departure_date: str,
                       trip_type: str = "one-way", seat: str = "economy",
-                      adults: int = 1, children: int = 0, infants_in_seat: int = 0, infants_on_lap: int = 0) -> list[str]:
+                      adults: int = 1, children: int = 0, infants_in_seat: int = 0, infants_on_lap: int = 0,
+                      response_format: Literal["text", "json"] = "json") -> list[str]:
    
     """ Get the best flights as determined by Google Flights for a given origin, destination, and departure date. If the user wants to do a round-trip,
     you will need to make two one-way trip calls.
@@ -383,76 +1018,22 @@ async def get_best_flights(origin: str, destination: str, departure_date: str,
         children (int, optional): The number of children. Defaults to 0.
         infants_in_seat (int, optional): The number of infants in a seat. Defaults to 0.
         infants_lap (int, optional): The number of infants on a lap. Defaults to 0.
+        response_format (str, optional): The response format ("json" or "text" only). "json" returns one compact JSON object per result set,
+            with each flight's fields and its price as a number. "text" returns human-readable descriptions and is deprecated. Defaults to "json".
 
     Returns:
         list[str]: A list of flight information strings.
     """
 
-    if (len(origin) != 3 or len(destination) != 3):
-        return ["Origin and destination must be 3 characters."]
-    
-    if (len(departure_date) != 10 or departure_date[4] != '-' or departure_date[7] != '-'):
-        return ["Departure date must be in YYYY-MM-DD format."]
-    
-    if (trip_type != "one-way" and trip_type != "round-trip"):
-        return ["Trip type must be either 'one-way' or 'round-trip'."]
-    
-    if (seat != "economy" and seat != "premium-economy" and seat != "business" and seat != "first"):
-        return ["Seat type must be either 'economy', 'premium-economy', 'business', or 'first'."]
+    if err := _validate(origin, destination, departure_date, trip_type, seat, response_format=response_format):
+        return [err]
 
     try:
-        # Make API call to Google Flights via fast-flights
-
-        flight_data_input = [FlightData(date=departure_date, from_airport=origin, to_airport=destination)]
-
-        passengers_input = Passengers(adults=adults, children=children, infants_in_seat=infants_in_seat, infants_on_lap=infants_on_lap)
-
-        # Create filter first, then get flights
-        filter = create_filter(
-            flight_data=flight_data_input,
-            trip=trip_type,
-            seat=seat,
-            passengers=passengers_input
-        )
-        
-        result: Result = await asyncio.to_thread(get_flights_from_filter, filter, mode="local")
-        
-        result = asdict(result)
-        
-        if not result or "flights" not in result:
-            return ["No flight data available for the specified route and dates."]
-
-        all_flights = result["flights"]
-
-        if not all_flights:
-            return ["No flights found for the specified route and dates."]
-
-        best_flights = []
-
-        for flight in all_flights:
-            if (flight['is_best']):
-                best_flights.append(flight)
+        # Make API call to Google Flights via fast-flights (cached)
+        passengers = (adults, children, infants_in_seat, infants_on_lap)
+        result: Result = await _fetch_flights(origin, destination, departure_date, trip_type, seat, passengers)
         
-        if not best_flights:
-            return ["No best flights found for the specified route and dates."]
-
-
-        top_n_flights = best_flights[0: min(30, len(best_flights))]
-
-        flight_info = []
-
-        origin_airport = origin
-        destination_airport = destination
-
-        for flight in top_n_flights:
-            flight_info.append(format_flight_info(flight, origin_airport, destination_airport))
-
-        output = ["Here are the best flights for this route and time: "] + flight_info
-
-
-        return output
-    
-
+        return await asyncio.to_thread(_postprocess, result, origin, destination, [("best", None, None)], response_format=response_format)
 
 
     except httpx.RequestError:
@@ -469,7 +1050,8 @@ async def get_best_flights(origin: str, destination: str, departure_date: str,
 @mcp.tool()
 async def get_time_filtered_flights(state: str, target_time_str: str, origin: str, destination: str, departure_date: str,
                       trip_type: str = "one-way", seat: str = "economy",
-                      adults: int = 1, children: int = 0, infants_in_seat: int = 0, infants_on_lap: int = 0) -> list[str]:
+                      adults: int = 1, children: int = 0, infants_in_seat: int = 0, infants_on_lap: int = 0,
+                      response_format: Literal["text", "json"] = "json") -> list[str]:
    
     """ Get time-filtered flight information based on the user's preferences for before or after a certain time for a given origin, destination, and departure date. If the user wants to do a round-trip,
     you will need to make two one-way trip calls.
@@ -487,25 +1069,15 @@ async def get_time_filtered_flights(state: str, target_time_str: str, origin: st
         children (int, optional): The number of children. Defaults to 0.
         infants_in_seat (int, optional): The number of infants in a seat. Defaults to 0.
         infants_lap (int, optional): The number of infants on a lap. Defaults to 0.
+        response_format (str, optional): The response format ("json" or "text" only). "json" returns one compact JSON object per result set,
+            with each flight's fields and its price as a number. "text" returns human-readable descriptions and is deprecated. Defaults to "json".
 
     Returns:
         list[str]: A list of flight information strings.
     """
 
-    if (len(origin) != 3 or len(destination) != 3):
-        return ["Origin and destination must be 3 characters."]
-    
-    if (len(departure_date) != 10 or departure_date[4] != '-' or departure_date[7] != '-'):
-        return ["Departure date must be in YYYY-MM-DD format."]
-    
-    if (trip_type != "one-way" and trip_type != "round-trip"):
-        return ["Trip type must be either 'one-way' or 'round-trip'."]
-    
-    if (seat != "economy" and seat != "premium-economy" and seat != "business" and seat != "first"):
-        return ["Seat type must be either 'economy', 'premium-economy', 'business', or 'first'."]
-    
-    if (state != "before" and state != "after"):
-        return ["State must be either 'before' or 'after'."]
+    if err := _validate(origin, destination, departure_date, trip_type, seat, state, response_format=response_format):
+        return [err]
 
     try:
         # Validate time format first
@@ -515,78 +1087,99 @@ async def get_time_filtered_flights(state: str, target_time_str: str, origin: st
         except ValueError:
             return ["Invalid time format. Please use HH:MM AM/PM format (e.g., '7:00 PM')."]
 
+        target_minutes = target_time.hour * 60 + target_time.minute
 
-        # Make API call to Google Flights via fast-flights
-        flight_data_input = [FlightData(date=departure_date, from_airport=origin, to_airport=destination)]
-
-        passengers_input = Passengers(adults=adults, children=children, infants_in_seat=infants_in_seat, infants_on_lap=infants_on_lap)
 
-        # Create filter first, then get flights
-        filter = create_filter(
-            flight_data=flight_data_input,
-            trip=trip_type,
-            seat=seat,
-            passengers=passengers_input
-        )
-        
-        result: Result = await asyncio.to_thread(get_flights_from_filter, filter, mode="local")
-        
-        result = asdict(result)
+        # Make API call to Google Flights via fast-flights (cached)
+        passengers = (adults, children, infants_in_seat, infants_on_lap)
+        result: Result = await _fetch_flights(origin, destination, departure_date, trip_type, seat, passengers)
         
-        if not result or "flights" not in result:
-            return ["No flight data available for the specified route and dates."]
+        return await asyncio.to_thread(_postprocess, result, origin, destination, [(state, target_minutes, target_time_str)], response_format=response_format)
 
 
-        all_flights = result["flights"]
+    except httpx.RequestError:
+        return ["Unable to connect to the flight search service. Please try again later."]
+    
+    except ValueError as e:
+        return [f"Invalid data received: {str(e)}"]
+    
+    except Exception as e:
+        return [f"An unexpected error occurred while searching for flights: {str(e)}"]
 
-        if not all_flights:
-            return ["No flights found for the specified route and dates."]
 
 
-        valid_flights = []
-        
-        for flight in all_flights:
+@mcp.tool()
+async def get_flights_multi(origin: str, destination: str, departure_date: str,
+                      views: list[str] | None = None,
+                      trip_type: str = "one-way", seat: str = "economy",
+                      adults: int = 1, children: int = 0, infants_in_seat: int = 0, infants_on_lap: int = 0,
+                      n_flights: int = 40,
+                      response_format: Literal["text", "json"] = "json") -> list[str]:
 
-            parts = flight['departure'].split(" ")
-            time_str = parts[0] + " " + parts[1]
+    """ Get several views of the flights for a given origin, destination, and departure date from a single search. Prefer this over calling
+    several of the other flight tools for the same route and date. If the user wants to do a round-trip, you will need to make two one-way trip calls.
+
+    Args:
+        origin (str): The origin airport IATA code (ex: "ATL", "SCL", "JFK").
+        destination (str): The destination airport IATA code (ex: "DTW", "ICN", "LIR").
+        departure_date (str): The departure date in YYYY-MM-DD format.
 
-            flight_time = datetime.strptime(time_str, '%I:%M %p').time()
+        views (list[str], optional): The views to return, in order. Each is one of "general", "cheapest", "best",
+            "before:HH:MM AM/PM" or "after:HH:MM AM/PM" (ex: "before:7:00 PM"). Defaults to ["cheapest", "best"].
+        trip_type (str, optional): The type of trip ("one-way" or "round-trip" only). Defaults to "one-way".
+        seat (str, optional): The type of seat ("economy", "premium-economy", "business", or "first" only). Defaults to "economy".
+        adults (int, optional): The number of adults. Defaults to 1.
+        children (int, optional): The number of children. Defaults to 0.
+        infants_in_seat (int, optional): The number of infants in a seat. Defaults to 0.
+        infants_lap (int, optional): The number of infants on a lap. Defaults to 0.
 
-            if (state == "before"):
-                if (flight_time < target_time):
-                    valid_flights.append(flight)
-            elif (state == "after"):
-                if (flight_time >= target_time):
-                    valid_flights.append(flight)
+        n_flights (int, optional): The number of flights to return for the "general" view. Defaults to 40.
+        response_format (str, optional): The response format ("json" or "text" only). "json" returns one compact JSON object per result set,
+            with each flight's fields and its price as a number. "text" returns human-readable descriptions and is deprecated. Defaults to "json".
 
-        if not valid_flights:
-            return [f"No flights found {state} {target_time_str} for the specified route and dates."]
+    Returns:
+        list[str]: A list of flight information strings, one section per requested view.
+    """
 
+    if err := _validate(origin, destination, departure_date, trip_type, seat, response_format=response_format):
+        return [err]
 
-        top_n_flights = valid_flights[0: min(30, len(valid_flights))]
+    if views is None:
+        views = ["cheapest", "best"]
 
-        flight_info = []
+    # Parse every view up front so a bad one fails before we search
+    parsed_views = []
 
-        origin_airport = origin
-        destination_airport = destination
+    for view in views:
+        if view in ("general", "cheapest", "best"):
+            parsed_views.append((view, None, None))
+            continue
 
-        for flight in top_n_flights:
-            flight_info.append(format_flight_info(flight, origin_airport, destination_airport))
+        state, _, target_time_str = view.partition(":")
+        if (state != "before" and state != "after"):
+            return [f"Invalid view '{view}'. Views must be 'general', 'cheapest', 'best', 'before:HH:MM AM/PM', or 'after:HH:MM AM/PM'."]
 
-        context_str = f"Here are the time-filtered flights {('before' if state == 'before' else 'on or after')} {target_time_str}: "
+        try:
+            target_time = datetime.strptime(target_time_str, '%I:%M %p').time()
+        except ValueError:
+            return [f"Invalid time in view '{view}'. Please use HH:MM AM/PM format (e.g., 'before:7:00 PM')."]
 
-        output = [context_str] + flight_info
+        parsed_views.append((state, target_time.hour * 60 + target_time.minute, target_time_str))
 
+    try:
+        # Make API call to Google Flights via fast-flights (cached), once for every view
+        passengers = (adults, children, infants_in_seat, infants_on_lap)
+        result: Result = await _fetch_flights(origin, destination, departure_date, trip_type, seat, passengers)
 
-        return output
+        return await asyncio.to_thread(_postprocess, result, origin, destination, parsed_views, n_flights, response_format=response_format)
 
 
     except httpx.RequestError:
         return ["Unable to connect to the flight search service. Please try again later."]
-    
+
     except ValueError as e:
         return [f"Invalid data received: {str(e)}"]
-    
+
     except Exception as e:
         return [f"An unexpected error occurred while searching for flights: {str(e)}"]
     
@@ -1,196 +1,515 @@
 #!/usr/bin/env python3
 """
 Test MCP client to submit requests to the flights MCP server
+
+orjson, ijson and uvloop are used when installed (pip install orjson ijson uvloop)
+to speed up JSON handling, response parsing and the event loop respectively.
 """
 
 import asyncio
+import atexit
+import contextvars
+import itertools
 import json
+import logging
+import os
+import select
+import signal
 import sys
-from datetime import datetime, timedelta
+import tempfile
+import time
+from datetime import date, timedelta
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dumps(message):
+        return orjson.dumps(message) + b"\n"
+
+    def _pretty(response):
+        return orjson.dumps(response, option=orjson.OPT_INDENT_2).decode('utf-8')
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(message):
+        return (json.dumps(message) + "\n").encode('utf-8')
+
+    def _pretty(response):
+        return json.dumps(response, indent=2)
+
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+except ImportError:
+    ijson = None
+
+
+log = logging.getLogger("mcp_test")
+
+sys.path.insert(0, '.')
+
+# Both tests run concurrently, so each tags its own output
+_tag = contextvars.ContextVar("tag", default="")
+
+
+def say(*args):
+    """Print args like print(), prefixing every line with the current test's tag"""
+    prefix = _tag.get()
+    print("\n".join(prefix + line for line in " ".join(map(str, args)).split("\n")))
+
+
+# The handshake never changes, so it is encoded once and reused for every run
+_HANDSHAKE_BYTES = _dumps({
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2024-11-05",
+        "capabilities": {"tools": {}},
+        "clientInfo": {"name": "test-client", "version": "1.0.0"}
+    }
+}) + _dumps({
+    "jsonrpc": "2.0",
+    "method": "notifications/initialized"
+})
+
+
+def _write_frames(pipe, data):
+    """Write data straight to the pipe's fd when it is small, falling back to the transport"""
+    # Writes under PIPE_BUF are atomic, and an empty transport buffer keeps frames in order.
+    # uvloop's pipe transports do not expose the pipe, so they always take the transport path
+    # Once the server has exited the pipe is closed, and the transport quietly drops the data
+    pipe_file = pipe.get_extra_info('pipe')
+    if (
+        pipe_file is not None
+        and not pipe.is_closing()
+        and len(data) <= select.PIPE_BUF
+        and not pipe.get_write_buffer_size()
+    ):
+        try:
+            os.write(pipe_file.fileno(), data)
+            return
+        except (OSError, ValueError):
+            # Full (BlockingIOError), broken or already closed; let the transport deal with it
+            pass
+    pipe.write(data)
+
+
+class FlightProtocol(asyncio.SubprocessProtocol):
+    """Splits the server's stdout into newline-delimited JSON-RPC messages
+
+    Responses to requests registered with expect() resolve their futures; every other
+    message, such as a notification, is logged at debug level and dropped. stderr is drained
+    as it arrives, so the server never blocks on a full pipe, and is forwarded to our
+    stderr only when debug logging is on.
+    """
+
+    def __init__(self):
+        loop = asyncio.get_running_loop()
+        self.exited = loop.create_future()
+        self.closed = loop.create_future()
+        self._forward_stderr = log.isEnabledFor(logging.DEBUG)
+        self._pending = {}
+        self._probes = {}
+        self._stdout_closed = False
+        self._buffer = bytearray()
+        self._scan_from = 0
+
+    def expect(self, request_id, parse=None):
+        """Return a future that resolves with the response to request_id
+
+        If parse is given, the future resolves with parse(frame) instead. The frame is first
+        looked for by probing its bytes for the id, so it is usually never decoded in full;
+        if the id is serialized differently, it is still matched after a full decode.
+        """
+        future = asyncio.get_running_loop().create_future()
+        if self._stdout_closed:
+            future.set_exception(ConnectionError("server closed its stdout"))
+        elif parse is None:
+            self._pending[request_id] = future
+        else:
+            self._probes[request_id] = (b'"id":%d,' % request_id, future, parse)
+        return future
+
+    @staticmethod
+    def _resolve_parsed(future, parse, frame):
+        if future.done():
+            return
+        try:
+            future.set_result(parse(frame))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _dispatch(self, frame):
+        for request_id, (probe, future, parse) in self._probes.items():
+            if probe in frame:
+                del self._probes[request_id]
+                self._resolve_parsed(future, parse, frame)
+                return
+
+        try:
+            message = _loads(frame)
+        except ValueError:
+            message = None
+        if not isinstance(message, dict):
+            log.debug("Skipping a line from the server that is not a JSON-RPC message: %r", frame)
+            return
+
+        request_id = message.get("id")
+        probed = self._probes.pop(request_id, None)
+        if probed is not None:
+            _, future, parse = probed
+            self._resolve_parsed(future, parse, frame)
+            return
+
+        future = self._pending.pop(request_id, None)
+        if future is None:
+            log.debug("Ignoring unsolicited message from the server: %r", message)
+        elif not future.done():
+            future.set_result(message)
+
+    def pipe_data_received(self, fd, data):
+        if fd != 1:
+            if self._forward_stderr:
+                sys.stderr.buffer.write(data)
+            return
+
+        buffer = self._buffer
+        buffer += data
+
+        # Only scan the bytes that arrived since the last partial frame
+        start = 0
+        newline = buffer.find(b"\n", self._scan_from)
+        try:
+            while newline != -1:
+                frame = bytes(buffer[start:newline])
+                # Consume the frame before dispatching it, so a frame that fails is never seen again
+                start = newline + 1
+                self._dispatch(frame)
+                newline = buffer.find(b"\n", start)
+        finally:
+            del buffer[:start]
+            self._scan_from = len(buffer)
+
+    def pipe_connection_lost(self, fd, exc):
+        if fd != 1:
+            return
+
+        self._stdout_closed = True
+
+        for future in [*self._pending.values(), *(future for _, future, _ in self._probes.values())]:
+            if not future.done():
+                future.set_exception(ConnectionError("server closed its stdout"))
+        self._pending.clear()
+        self._probes.clear()
+
+    def process_exited(self):
+        if not self.exited.done():
+            self.exited.set_result(None)
+
+    def connection_lost(self, exc):
+        # Called once the process has exited and all of its pipes are drained
+        if not self.closed.done():
+            self.closed.set_result(None)
+
+
+# (local date, the following day as YYYY-MM-DD) for tomorrow_str()
+_tomorrow = (None, None)
+
+
+def tomorrow_str():
+    """Return tomorrow's local date as YYYY-MM-DD, recomputed only when the day changes"""
+    global _tomorrow
+    today = time.localtime()[:3]
+    if _tomorrow[0] != today:
+        _tomorrow = (today, (date(*today) + timedelta(days=1)).isoformat())
+    return _tomorrow[1]
+
+
+# Request ids continue across runs on a reused server; 1 is the handshake's initialize
+_request_ids = itertools.count(2)
+
+# Running (or starting) servers, keyed by the working directory they were started in
+_servers = {}
+
+
+class FlightServer:
+    """A flights.py subprocess that stays alive across test runs"""
+
+    def __init__(self, transport, protocol):
+        self.transport = transport
+        self.protocol = protocol
+        self.stdin = transport.get_pipe_transport(0)
+        self.initialized = protocol.expect(1)
+        _write_frames(self.stdin, _HANDSHAKE_BYTES)
+
+    def send(self, *messages):
+        _write_frames(self.stdin, b"".join(_dumps(message) for message in messages))
+
+    def request(self, method, params, parse=None):
+        """Send a request and return a future that resolves with its response (see FlightProtocol.expect)"""
+        request_id = next(_request_ids)
+        response = self.protocol.expect(request_id, parse)
+        self.send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+        return response
+
+    async def close(self):
+        """Shut the server down, terminating it if it does not exit on its own"""
+        try:
+            say("\ngracefully shutting down the server...")
+            shutdown_id = next(_request_ids)
+            acknowledged = self.protocol.expect(shutdown_id)
+            self.send(
+                {"jsonrpc": "2.0", "id": shutdown_id, "method": "shutdown"},
+                {"jsonrpc": "2.0", "method": "exit"}
+            )
+            # The server exits once it sees EOF on stdin; the transport flushes before closing
+            self.stdin.close()
+
+            try:
+                await asyncio.wait_for(acknowledged, timeout=10.0)
+                say("Shutdown acknowledged by server.")
+            except asyncio.TimeoutError:
+                say("Timed out waiting for shutdown response.")
+            except ConnectionError:
+                pass
+
+            await asyncio.wait_for(asyncio.shield(self.protocol.closed), timeout=10.0)
+            say("Server process terminated.")
+
+        except Exception:
+            log.exception("MCP server shutdown failed")
+        finally:
+            if self.transport.get_returncode() is None:
+                say("Terminating process forcefully.")
+                self.transport.terminate()
+                await self.protocol.exited
+            self.transport.close()
+
+
+async def _start_server():
+    # No fd closing, fd passing or cwd change lets CPython spawn the server with
+    # posix_spawn() instead of fork() plus a scan closing every inherited fd;
+    # Python's own fds are already non-inheritable
+    transport, protocol = await asyncio.get_running_loop().subprocess_exec(
+        FlightProtocol,
+        sys.executable, "flights.py",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        close_fds=False,
+        pass_fds=(),
+        start_new_session=False
+    )
+    return FlightServer(transport, protocol)
+
+
+async def get_or_create_server():
+    """Return the running server for the current directory, starting one if needed"""
+    cwd = os.getcwd()
+    starting = _servers.get(cwd)
+    if (
+        starting is None
+        or (starting.done() and (starting.exception() or starting.result().transport.get_returncode() is not None))
+    ):
+        if not _servers:
+            atexit.register(_close_servers_at_exit)
+        starting = _servers[cwd] = asyncio.ensure_future(_start_server())
+    return await starting
+
+
+async def close_servers():
+    """Shut down every server started by get_or_create_server()"""
+    starting = list(_servers.values())
+    _servers.clear()
+    for server in await asyncio.gather(*starting, return_exceptions=True):
+        if isinstance(server, FlightServer):
+            await server.close()
+
+
+def _close_servers_at_exit():
+    # Last resort for servers still running when the event loop is gone: send shutdown
+    # and exit, then close stdin so the server sees EOF
+    for starting in _servers.values():
+        if not starting.done() or starting.cancelled() or starting.exception():
+            continue
+        server = starting.result()
+        if server.transport.get_returncode() is None:
+            pipe = server.stdin.get_extra_info('pipe')
+            try:
+                if pipe is None:
+                    # uvloop does not expose the pipe, so the server can only be signalled
+                    os.kill(server.transport.get_pid(), signal.SIGTERM)
+                    continue
+                os.write(pipe.fileno(), _dumps({"jsonrpc": "2.0", "id": next(_request_ids), "method": "shutdown"})
+                         + _dumps({"jsonrpc": "2.0", "method": "exit"}))
+                pipe.close()
+            except (OSError, ValueError):
+                pass
+
+
+# How much of each flight text the tests print
+_PREVIEW_CHARS = 150
+
+
+def _summarize_tool_response(frame):
+    """Decode a tools/call response without its structuredContent, which duplicates the content,
+    keeping only the first _PREVIEW_CHARS characters of each content text
+    """
+    if ijson is None:
+        response = _loads(frame)
+        if isinstance(response.get("result"), dict):
+            response["result"].pop("structuredContent", None)
+    else:
+        # Stream the frame so structuredContent is never built; everything else is kept as is
+        builder = ObjectBuilder()
+        for prefix, event, value in ijson.parse(frame, use_float=True):
+            if (
+                prefix == "result.structuredContent"
+                or prefix.startswith("result.structuredContent.")
+                or (prefix == "result" and event == "map_key" and value == "structuredContent")
+            ):
+                continue
+            builder.event(event, value)
+        response = builder.value
+
+    result = response.get("result")
+    for item in result.get("content", ()) if isinstance(result, dict) else ():
+        if isinstance(item, dict) and isinstance(item.get('text'), str):
+            item['text'] = item['text'][:_PREVIEW_CHARS]
+    return response
+
 
 async def test_mcp_flight_request():
     """Test flight search from JFK to FCO using MCP protocol"""
+    _tag.set("[MCP] ")
     
-    print("Testing MCP Flight Request: JFK → FCO")
-    print("="*50)
+    tomorrow = tomorrow_str()
     
-    tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-    
-    print(f"Searching for flights on: {tomorrow}")
-    print(f"Route: JFK (New York) → FCO (Rome)")
-    print(f"Passengers: 1 adult, Economy class")
-    print(f"Requesting: 5 flights")
-    print("\nStarting MCP server and performing handshake...")
+    say(f"""Testing MCP Flight Request: JFK → FCO
+{"="*50}
+Searching for flights on: {tomorrow}
+Route: JFK (New York) → FCO (Rome)
+Passengers: 1 adult, Economy class
+Requesting: 5 flights
+
+Starting MCP server and performing handshake...""")
     
-    process = None
     try:
-        process = await asyncio.create_subprocess_exec(
-            sys.executable, "flights.py",
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd="."
-        )
-        
-        async def send_message(writer, message):
-            writer.write((json.dumps(message) + "\n").encode('utf-8'))
-            await writer.drain()
-
-        initialize_request = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "initialize",
-            "params": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {"tools": {}},
-                "clientInfo": {"name": "test-client", "version": "1.0.0"}
-            }
-        }
-        print("Sending initialize request...")
-        await send_message(process.stdin, initialize_request)
-        
-        initialized_notification = {
-            "jsonrpc": "2.0",
-            "method": "notifications/initialized"
-        }
-        print("Sending initialized notification...")
-        await send_message(process.stdin, initialized_notification)
-
-        tool_request = {
-            "jsonrpc": "2.0",
-            "id": 2,
-            "method": "tools/call",
-            "params": {
-                "name": "get_general_flights_info",
-                "arguments": {
-                    "origin": "JFK", "destination": "FCO", "departure_date": tomorrow,
-                    "trip_type": "one-way", "seat": "economy", "adults": 1, "n_flights": 5
-                }
+        server = await get_or_create_server()
+
+        say("Sending tool call request...")
+        tool_response = server.request("tools/call", {
+            "name": "get_general_flights_info",
+            "arguments": {
+                "origin": "JFK", "destination": "FCO", "departure_date": tomorrow,
+                "trip_type": "one-way", "seat": "economy", "adults": 1, "n_flights": 5,
+                "response_format": "text"
             }
-        }
-        print("Sending tool call request...")
-        await send_message(process.stdin, tool_request)
+        }, parse=None if log.isEnabledFor(logging.DEBUG) else _summarize_tool_response)
+        # Shielded because the initialize response is shared by every run on this server
+        responses = asyncio.gather(asyncio.shield(server.initialized), tool_response)
 
-        print("\nWaiting for responses...")
+        say("\nWaiting for responses...")
         
         tool_response_found = False
         
-        while True:
-            try:
-                line = await asyncio.wait_for(process.stdout.readline(), timeout=90.0)
-                if not line:
-                    break
-                
-                response = json.loads(line.decode('utf-8').strip())
-                print(f"\nReceived Response:\n{json.dumps(response, indent=2)}")
-
-                if response.get("id") == 2: 
-                    tool_response_found = True
-                    if "result" in response and "content" in response["result"]:
-                        flights = response["result"]["content"]
-                        if isinstance(flights, list) and len(flights) > 0:
-                            print(f"\nSUCCESS! Found {len(flights)} flight results:")
-                            for j, flight in enumerate(flights, 1):
-                                if isinstance(flight, dict) and 'text' in flight:
-                                    print(f"  Flight {j}: {flight['text'][:150]}...")
-                                else:
-                                    print(f"  Flight {j}: {str(flight)[:150]}...")
-                        else:
-                            print("\nNo flights found in response.")
-                    else:
-                        print("\nError in tool response.")
-                    break 
-            
-            except asyncio.TimeoutError:
-                print("\nTimed out waiting for server response after 90 seconds.")
-                break
+        try:
+            for response in await asyncio.wait_for(responses, timeout=90.0):
+                say(f"\nReceived Response:\n{_pretty(response)}")
+        except asyncio.TimeoutError:
+            say("\nTimed out waiting for server response after 90 seconds.")
+        except ConnectionError:
+            pass
+        else:
+            tool_response_found = True
+            if "result" in response and "content" in response["result"]:
+                flights = response["result"]["content"]
+                if isinstance(flights, list) and len(flights) > 0:
+                    say(f"\nSUCCESS! Found {len(flights)} flight results:\n" + "\n".join(
+                        f"  Flight {j}: {(flight['text'] if isinstance(flight, dict) and 'text' in flight else str(flight))[:_PREVIEW_CHARS]}..."
+                        for j, flight in enumerate(flights, 1)
+                    ))
+                else:
+                    say("\nNo flights found in response.")
+            else:
+                say("\nError in tool response.")
         
         if not tool_response_found:
-            print("\nDid not receive the final tool response.")
+            say("\nDid not receive the final tool response.")
 
-        print("\ngracefully shutting down the server...")
-        shutdown_request = {"jsonrpc": "2.0", "id": 3, "method": "shutdown"}
-        await send_message(process.stdin, shutdown_request)
-        
-        while True:
-            try:
-                line = await asyncio.wait_for(process.stdout.readline(), timeout=10.0)
-                if not line:
-                    break
-                response = json.loads(line.decode('utf-8').strip())
-                if response.get("id") == 3:
-                    print("Shutdown acknowledged by server.")
-                    break
-            except asyncio.TimeoutError:
-                print("Timed out waiting for shutdown response.")
-                break
-
-        exit_notification = {"jsonrpc": "2.0", "method": "exit"}
-        await send_message(process.stdin, exit_notification)
-        
-        await asyncio.wait_for(process.wait(), timeout=10.0)
-        print("Server process terminated.")
-
-    except Exception as e:
-        print(f"\nError during MCP request: {e}")
-        import traceback
-        traceback.print_exc()
-    finally:
-        if process and process.returncode is None:
-            print("Terminating process forcefully.")
-            process.terminate()
-            await process.wait()
+    except Exception:
+        log.exception("MCP request failed")
 
 async def test_simple_import():
     """Test direct function call without MCP protocol"""
-    print("\n" + "="*50)
-    print("Testing Direct Function Call (Fallback)")
-    print("="*50)
+    _tag.set("[DIRECT] ")
+    say("\n" + "="*50)
+    say("Testing Direct Function Call (Fallback)")
+    say("="*50)
     
+    flights = None
+    profile_dir = tempfile.TemporaryDirectory(prefix="flights-mcp-test-")
     try:
-        sys.path.insert(0, '.')
-        from flights import get_general_flights_info
+        import flights
+
+        # The server subprocess runs at the same time on the default Chromium profile, and
+        # Chromium allows one instance per profile, so the in-process browser gets its own
+        flights.BROWSER_USER_DATA_DIR = profile_dir.name
         
-        tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+        tomorrow = tomorrow_str()
         
-        print(f"Searching for flights on: {tomorrow}")
-        print(f"Route: JFK → FCO")
-        print("Calling function directly...")
+        say(f"Searching for flights on: {tomorrow}")
+        say(f"Route: JFK → FCO")
+        say("Calling function directly...")
         
-        result = await get_general_flights_info(
+        result = await flights.get_general_flights_info(
             origin="JFK",
             destination="FCO", 
             departure_date=tomorrow,
             trip_type="one-way",
             seat="economy",
             adults=1,
-            n_flights=3
+            n_flights=3,
+            response_format="text"
         )
         
-        print(f"\nDirect Function Result:")
+        say(f"\nDirect Function Result:")
         if isinstance(result, list):
-            print(f"Found {len(result)} results:")
-            for i, flight in enumerate(result, 1):
-                print(f"  Result {i}: {flight[:150]}...")
+            say(f"Found {len(result)} results:\n" + "\n".join(
+                f"  Result {i}: {flight[:_PREVIEW_CHARS]}..." for i, flight in enumerate(result, 1)
+            ))
         else:
-            print(f"Result: {result}")
+            say(f"Result: {result}")
             
-    except Exception as e:
-        print(f"\nError in direct function call: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        log.exception("Direct function call failed")
+    finally:
+        # Stop the in-process Playwright driver and Chromium before the event loop goes away
+        if flights is not None:
+            await flights._close_browser()
+        profile_dir.cleanup()
 
 async def main():
     print("MCP Flights Server Test Client")
     print("Testing flight search: JFK → FCO")
     print("="*60)
     
-    await test_mcp_flight_request()
-    
-    await test_simple_import()
+    await asyncio.gather(test_mcp_flight_request(), test_simple_import())
+
+    _tag.set("[MCP] ")
+    await close_servers()
     
     print("\n" + "="*60)
     print("Test completed!")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    logging.basicConfig(level=os.environ.get("MCP_TEST_LOG", "INFO"))
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
\ No newline at end of file